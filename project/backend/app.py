@@ -1,15 +1,18 @@
-from flask import Flask, request, jsonify, send_from_directory
+from flask import Flask, Response, request, jsonify, send_from_directory
 from flask_cors import CORS
 import os
 import json
 import time
 import uuid
 from datetime import datetime
+from werkzeug.http import is_resource_modified
 from werkzeug.utils import secure_filename
 
 from config import Config
 from utils.pdf_processor import PDFProcessor
 from utils.ollama_client import OllamaClient
+from utils.chunked_upload import ChunkedUploadManager, UploadLimitError
+from utils.session_store import SessionStore
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -20,14 +23,53 @@ pdf_processor = PDFProcessor()
 ollama_client = OllamaClient()
 
 # In-memory storage for demo (use database in production)
-sessions = {}
+sessions = SessionStore(compression_min_size=Config.COMPRESSION_MIN_SIZE)
 uploaded_files = {}
 
+def store_extracted_upload(upload, pdf_data):
+    """Register a chunked upload once background extraction finishes"""
+    uploaded_files[upload["upload_id"]] = {
+        "filename": upload["filename"],
+        "filepath": upload["filepath"],
+        "upload_time": datetime.now().isoformat(),
+        "pdf_data": pdf_data
+    }
+
+upload_manager = ChunkedUploadManager(
+    pdf_processor,
+    Config.UPLOAD_FOLDER,
+    Config.UPLOAD_CHUNK_SIZE,
+    Config.MAX_UPLOAD_SIZE,
+    max_workers=Config.EXTRACTION_WORKERS,
+    upload_ttl=Config.UPLOAD_TTL,
+    max_active_uploads=Config.MAX_ACTIVE_UPLOADS,
+    on_extracted=store_extracted_upload
+)
+
 def allowed_file(filename):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in Config.ALLOWED_EXTENSIONS
 
+def session_response(session_id, fields=None, since=None):
+    """Serve a session payload with ETag/Last-Modified validators and compression"""
+    etag, last_modified = sessions.validators(session_id, fields=fields, since=since)
+    
+    if not is_resource_modified(request.environ, etag=etag, last_modified=last_modified):
+        response = Response(status=304)
+    else:
+        encoding = request.accept_encodings.best_match(sessions.encodings)
+        body, encoding = sessions.render(session_id, fields=fields, since=since, encoding=encoding)
+        response = Response(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    
+    response.set_etag(etag, weak=True)
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    response.vary.add('Accept-Encoding')
+    return response
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -88,6 +130,54 @@ def upload_pdf():
             "error": str(e)
         }), 500
 
+@app.route('/api/uploads', methods=['POST'])
+def create_chunked_upload():
+    """Start a resumable chunked upload"""
+    try:
+        data = request.get_json() or {}
+        filename = data.get('filename', '')
+        
+        if not allowed_file(filename):
+            return jsonify({"error": "Only PDF files are allowed"}), 400
+        
+        upload = upload_manager.create_upload(filename, data.get('total_size'), data.get('sha256'))
+        return jsonify(upload), 201
+        
+    except UploadLimitError as e:
+        return jsonify({"error": str(e)}), 429
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>/chunks/<int:index>', methods=['PUT'])
+def upload_chunk(upload_id, index):
+    """Receive one chunk of a chunked upload; the body is the raw chunk bytes"""
+    try:
+        upload = upload_manager.write_chunk(
+            upload_id,
+            index,
+            request.get_data(cache=False),
+            request.headers.get('X-Chunk-SHA256')
+        )
+        return jsonify(upload)
+        
+    except KeyError:
+        return jsonify({"error": "Upload not found"}), 404
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+def get_chunked_upload(upload_id):
+    """Report received chunks and extraction progress for a chunked upload"""
+    upload = upload_manager.get_status(upload_id)
+    if upload is None:
+        return jsonify({"error": "Upload not found"}), 404
+    
+    return jsonify(upload)
+
 @app.route('/api/summary', methods=['GET'])
 def get_summary():
     """Generate AI summary for uploaded PDF"""
@@ -247,20 +337,40 @@ def process_pdf():
         }
         
         # Store session
-        sessions[session_id] = session_data
+        sessions.create(session_data)
         
-        return jsonify(session_data)
+        return session_response(session_id)
         
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 @app.route('/api/sessions/<session_id>', methods=['GET'])
 def get_session(session_id):
-    """Retrieve a learning session"""
+    """Retrieve a learning session, optionally limited to ?fields=summary,questions"""
+    if session_id not in sessions:
+        return jsonify({"error": "Session not found"}), 404
+    
+    fields = request.args.get('fields')
+    try:
+        return session_response(session_id, fields=fields.split(',') if fields else None)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+@app.route('/api/sessions/<session_id>/changes', methods=['GET'])
+def get_session_changes(session_id):
+    """Return only the session fields that changed after ?since=<version>"""
     if session_id not in sessions:
         return jsonify({"error": "Session not found"}), 404
     
-    return jsonify(sessions[session_id])
+    since = request.args.get('since', type=int)
+    if since is None:
+        return jsonify({"error": "since must be a session version number"}), 400
+    
+    fields = request.args.get('fields')
+    try:
+        return session_response(session_id, fields=fields.split(',') if fields else None, since=since)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
 @app.route('/api/sessions/<session_id>/progress', methods=['PUT'])
 def update_progress(session_id):
@@ -271,10 +381,16 @@ def update_progress(session_id):
     data = request.get_json()
     progress = data.get('progress', 0)
     
-    sessions[session_id]['progress'] = progress
-    sessions[session_id]['updated_at'] = datetime.now().isoformat()
+    # Unchanged progress must not bump the version, or polling clients lose their cached copy
+    session = sessions.get(session_id)
+    version = session["version"]
+    if session.get("progress") != progress:
+        version = sessions.update(session_id, {
+            "progress": progress,
+            "updated_at": datetime.now().isoformat()
+        })
     
-    return jsonify({"success": True, "progress": progress})
+    return jsonify({"success": True, "progress": progress, "version": version})
 
 @app.errorhandler(404)
 def not_found(error):
@@ -289,12 +405,16 @@ if __name__ == '__main__':
     print("📊 Available endpoints:")
     print("   - GET  /api/health")
     print("   - POST /api/upload")
+    print("   - POST /api/uploads")
+    print("   - PUT  /api/uploads/<upload_id>/chunks/<index>")
+    print("   - GET  /api/uploads/<upload_id>")
     print("   - GET  /api/summary?pdf_id=<id>")
     print("   - GET  /api/questions?pdf_id=<id>")
     print("   - GET  /api/concepts?pdf_id=<id>")
     print("   - GET  /api/insights?pdf_id=<id>")
     print("   - POST /api/process")
     print("   - GET  /api/sessions/<session_id>")
+    print("   - GET  /api/sessions/<session_id>/changes?since=<version>")
     print("   - PUT  /api/sessions/<session_id>/progress")
     print("🤖 AI-powered by Ollama")
     print("📝 Real PDF processing with PyMuPDF")
@@ -13,6 +13,16 @@ class Config:
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
     ALLOWED_EXTENSIONS = {'pdf'}
     
+    # Chunked Upload Configuration (each chunk must fit within MAX_CONTENT_LENGTH)
+    UPLOAD_CHUNK_SIZE = int(os.getenv('UPLOAD_CHUNK_SIZE', 4 * 1024 * 1024))  # 4MB per chunk
+    MAX_UPLOAD_SIZE = int(os.getenv('MAX_UPLOAD_SIZE', 512 * 1024 * 1024))  # 512MB max chunked file size
+    EXTRACTION_WORKERS = int(os.getenv('EXTRACTION_WORKERS', 2))
+    UPLOAD_TTL = int(os.getenv('UPLOAD_TTL', 3600))  # Seconds before an idle upload is discarded
+    MAX_ACTIVE_UPLOADS = int(os.getenv('MAX_ACTIVE_UPLOADS', 20))
+    
+    # Response Configuration
+    COMPRESSION_MIN_SIZE = int(os.getenv('COMPRESSION_MIN_SIZE', 1024))  # Smaller payloads are sent uncompressed
+    
     # Processing Configuration
     MAX_SUMMARY_LENGTH = 500
     NUM_QUESTIONS = 5
@@ -0,0 +1,278 @@
+import hashlib
+import math
+import os
+import re
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional
+
+SHA256_PATTERN = re.compile(r"^[0-9a-fA-F]{64}$")
+
+
+class UploadLimitError(Exception):
+    """Raised when too many chunked uploads are already in flight"""
+
+
+class ChunkedUploadManager:
+    """Handles resumable chunked PDF uploads and background text extraction"""
+
+    def __init__(self, pdf_processor, upload_folder: str, chunk_size: int,
+                 max_upload_size: int, max_workers: int = 2,
+                 upload_ttl: int = 3600, max_active_uploads: int = 20,
+                 on_extracted: Optional[Callable[[Dict, Dict], None]] = None):
+        self.pdf_processor = pdf_processor
+        self.upload_folder = upload_folder
+        self.chunk_size = chunk_size
+        self.max_upload_size = max_upload_size
+        self.upload_ttl = timedelta(seconds=upload_ttl)
+        self.max_active_uploads = max_active_uploads
+        self.on_extracted = on_extracted
+
+        self._uploads = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def create_upload(self, filename: str, total_size: int, file_sha256: Optional[str] = None) -> Dict:
+        """Register a new upload and preallocate its part file"""
+        # bool is a subclass of int, so True would otherwise pass as a size of 1
+        if isinstance(total_size, bool) or not isinstance(total_size, int) or total_size <= 0:
+            raise ValueError("total_size must be a positive integer")
+        if total_size > self.max_upload_size:
+            raise ValueError(f"File exceeds maximum upload size of {self.max_upload_size} bytes")
+        if file_sha256 is not None and not (isinstance(file_sha256, str) and SHA256_PATTERN.match(file_sha256)):
+            raise ValueError("sha256 must be a 64-character hex string")
+
+        self.sweep_expired()
+
+        upload_id = str(uuid.uuid4())
+        now = datetime.now().isoformat()
+        upload = {
+            "upload_id": upload_id,
+            "filename": filename,
+            "total_size": total_size,
+            "chunk_size": self.chunk_size,
+            "total_chunks": math.ceil(total_size / self.chunk_size),
+            "expected_sha256": file_sha256.lower() if file_sha256 else None,
+            "sha256": None,
+            "part_path": os.path.join(self.upload_folder, f"{upload_id}.part"),
+            "filepath": None,
+            "chunk_digests": {},
+            "hashed_chunks": 0,
+            "hasher": hashlib.sha256(),
+            "status": "uploading",
+            "pages_done": 0,
+            "page_count": None,
+            "error": None,
+            "created_at": now,
+            "updated_at": now,
+            "lock": threading.Lock()
+        }
+
+        # Count and reserve the slot in one step so concurrent creates cannot overshoot the cap
+        with self._lock:
+            active = sum(1 for u in self._uploads.values() if u["status"] == "uploading")
+            if active >= self.max_active_uploads:
+                raise UploadLimitError("Too many uploads in progress, try again later")
+            self._uploads[upload_id] = upload
+
+        try:
+            with open(upload["part_path"], "wb") as f:
+                f.truncate(total_size)
+        except OSError:
+            with self._lock:
+                del self._uploads[upload_id]
+            self._remove_files(upload)
+            raise
+
+        return self._status(upload)
+
+    def sweep_expired(self):
+        """Forget uploads idle for longer than upload_ttl and delete their part files
+
+        Uploads still being verified or extracted are left alone; extracted PDFs
+        stay on disk because uploaded_files keeps referring to them.
+        """
+        cutoff = datetime.now() - self.upload_ttl
+
+        expired = []
+        with self._lock:
+            for upload in list(self._uploads.values()):
+                # An upload whose lock is held is receiving a chunk right now, so it is not idle
+                if not upload["lock"].acquire(blocking=False):
+                    continue
+                if (upload["status"] in ("uploading", "completed", "failed")
+                        and datetime.fromisoformat(upload["updated_at"]) < cutoff):
+                    del self._uploads[upload["upload_id"]]
+                    expired.append(upload)
+                else:
+                    upload["lock"].release()
+
+        # Files are removed while still holding each upload's lock, so a write_chunk
+        # waiting on it sees the upload unregistered instead of a missing part file
+        for upload in expired:
+            try:
+                self._remove_files(upload)
+            finally:
+                upload["lock"].release()
+
+    def get_upload(self, upload_id: str) -> Optional[Dict]:
+        with self._lock:
+            return self._uploads.get(upload_id)
+
+    def write_chunk(self, upload_id: str, index: int, data: bytes, chunk_sha256: str) -> Dict:
+        """Verify and store a single chunk, finalizing the upload once all chunks are present"""
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            raise KeyError(upload_id)
+
+        if not chunk_sha256 or not SHA256_PATTERN.match(chunk_sha256):
+            raise ValueError("Missing or malformed chunk checksum")
+        chunk_sha256 = chunk_sha256.lower()
+
+        with upload["lock"]:
+            # The upload may have been swept between get_upload and taking its lock
+            if self._uploads.get(upload_id) is not upload:
+                raise KeyError(upload_id)
+
+            # Retried chunks that already landed are acknowledged without rewriting
+            if upload["chunk_digests"].get(index) == chunk_sha256:
+                return self._status(upload)
+
+            if upload["status"] != "uploading":
+                raise ValueError(f"Upload is not accepting chunks (status: {upload['status']})")
+
+            if index < 0 or index >= upload["total_chunks"]:
+                raise ValueError("Chunk index out of range")
+
+            expected_length = min(self.chunk_size, upload["total_size"] - index * self.chunk_size)
+            if len(data) != expected_length:
+                raise ValueError(f"Chunk {index} must be {expected_length} bytes, got {len(data)}")
+
+            if hashlib.sha256(data).hexdigest() != chunk_sha256:
+                raise ValueError(f"Checksum mismatch for chunk {index}")
+
+            if index in upload["chunk_digests"]:
+                raise ValueError(f"Chunk {index} was already received with different content")
+
+            with open(upload["part_path"], "r+b") as f:
+                f.seek(index * self.chunk_size)
+                f.write(data)
+            upload["chunk_digests"][index] = chunk_sha256
+            self._advance_hash(upload, index, data)
+
+            upload["updated_at"] = datetime.now().isoformat()
+
+            if len(upload["chunk_digests"]) == upload["total_chunks"]:
+                upload["status"] = "verifying"
+                self._executor.submit(self._finalize, upload)
+
+            return self._status(upload)
+
+    def get_status(self, upload_id: str) -> Optional[Dict]:
+        """Return a JSON-serializable view of an upload"""
+        upload = self.get_upload(upload_id)
+        if upload is None:
+            return None
+        return self._status(upload)
+
+    def _status(self, upload: Dict) -> Dict:
+        received = upload["chunk_digests"]
+        return {
+            "upload_id": upload["upload_id"],
+            "pdf_id": upload["upload_id"] if upload["status"] == "completed" else None,
+            "filename": upload["filename"],
+            "status": upload["status"],
+            "total_size": upload["total_size"],
+            "chunk_size": upload["chunk_size"],
+            "total_chunks": upload["total_chunks"],
+            "received_chunks": len(received),
+            "missing_chunks": [i for i in range(upload["total_chunks"]) if i not in received],
+            "upload_progress": round(100 * len(received) / upload["total_chunks"]),
+            "pages_done": upload["pages_done"],
+            "page_count": upload["page_count"],
+            "sha256": upload["sha256"],
+            "error": upload["error"],
+            "created_at": upload["created_at"],
+            "updated_at": upload["updated_at"]
+        }
+
+    def _advance_hash(self, upload: Dict, index: int, data: bytes):
+        """Feed the running file hash while chunks arrive in order
+
+        Out-of-order chunks are left for _finalize to hash from disk, so a request
+        never reads back more than the chunk it carries.
+        """
+        if index == upload["hashed_chunks"]:
+            upload["hasher"].update(data)
+            upload["hashed_chunks"] += 1
+
+    def _finalize(self, upload: Dict):
+        """Finish the running hash in the background, verify it and extract the PDF
+
+        Runs on the executor, whose futures are never inspected, so any error must
+        land on the upload rather than leave it stuck in verifying.
+        """
+        try:
+            with open(upload["part_path"], "rb") as f:
+                f.seek(upload["hashed_chunks"] * self.chunk_size)
+                while upload["hashed_chunks"] < upload["total_chunks"]:
+                    upload["hasher"].update(f.read(self.chunk_size))
+                    upload["hashed_chunks"] += 1
+
+            upload["sha256"] = upload["hasher"].hexdigest()
+
+            # On a mismatch the part file is kept and every chunk is marked missing again,
+            # so the client can re-send them under the same upload_id
+            if upload["expected_sha256"] and upload["sha256"] != upload["expected_sha256"]:
+                with upload["lock"]:
+                    upload["chunk_digests"] = {}
+                    upload["hashed_chunks"] = 0
+                    upload["hasher"] = hashlib.sha256()
+                    upload["status"] = "uploading"
+                    upload["error"] = "File checksum mismatch, all chunks must be re-sent"
+                    upload["updated_at"] = datetime.now().isoformat()
+                return
+
+            filepath = os.path.join(self.upload_folder, f"{upload['upload_id']}.pdf")
+            os.replace(upload["part_path"], filepath)
+            upload["filepath"] = filepath
+            upload["status"] = "extracting"
+            upload["error"] = None
+            upload["updated_at"] = datetime.now().isoformat()
+        except Exception as e:
+            upload["status"] = "failed"
+            upload["error"] = str(e)
+            upload["updated_at"] = datetime.now().isoformat()
+            return
+
+        self._extract(upload)
+
+    def _extract(self, upload: Dict):
+        """Run text extraction in the background, recording page progress"""
+        def on_progress(pages_done: int, page_count: int):
+            upload["pages_done"] = pages_done
+            upload["page_count"] = page_count
+
+        try:
+            pdf_data = self.pdf_processor.extract_text(upload["filepath"], progress_callback=on_progress)
+            if self.on_extracted:
+                self.on_extracted(upload, pdf_data)
+            upload["status"] = "completed"
+        except Exception as e:
+            upload["status"] = "failed"
+            upload["error"] = str(e)
+            self._remove_files(upload)
+
+        upload["updated_at"] = datetime.now().isoformat()
+
+    def _remove_files(self, upload: Dict):
+        """Delete an upload's part file, and its PDF unless extraction completed"""
+        paths = [upload["part_path"]]
+        if upload["status"] != "completed" and upload["filepath"]:
+            paths.append(upload["filepath"])
+
+        for path in paths:
+            if os.path.exists(path):
+                os.remove(path)
@@ -1,6 +1,6 @@
 import fitz  # PyMuPDF
 import re
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 
 class PDFProcessor:
     """Handles PDF text extraction and preprocessing"""
@@ -8,8 +8,12 @@ class PDFProcessor:
     def __init__(self):
         self.min_text_length = 100
         
-    def extract_text(self, pdf_path: str) -> Dict[str, any]:
-        """Extract text and metadata from PDF"""
+    def extract_text(self, pdf_path: str,
+                     progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, any]:
+        """Extract text and metadata from PDF
+
+        If given, progress_callback(pages_done, page_count) is called after each page.
+        """
         try:
             doc = fitz.open(pdf_path)
             
@@ -22,6 +26,9 @@ class PDFProcessor:
                 page_text = page.get_text()
                 page_texts.append(page_text)
                 full_text += page_text + "\n"
+                
+                if progress_callback:
+                    progress_callback(page_num + 1, len(doc))
             
             # Get document metadata
             metadata = doc.metadata
@@ -0,0 +1,150 @@
+import gzip
+import hashlib
+import json
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+
+class SessionStore:
+    """Versioned in-memory session storage with pre-serialized JSON payloads"""
+
+    def __init__(self, compression_min_size: int = 1024, brotli_quality: int = 5, gzip_level: int = 6):
+        self.compression_min_size = compression_min_size
+        self.brotli_quality = brotli_quality
+        self.gzip_level = gzip_level
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    @property
+    def encodings(self) -> Tuple[str, ...]:
+        """Content encodings this store can produce, in order of preference"""
+        return ("br", "gzip") if brotli else ("gzip",)
+
+    def create(self, session_data: Dict) -> Dict:
+        """Store a new session at version 1"""
+        entry = {
+            "data": dict(session_data),
+            "version": 1,
+            "field_versions": {},
+            "fragments": {},
+            "bodies": {},
+            "last_modified": None
+        }
+        self._apply(entry, session_data)
+
+        with self._lock:
+            self._sessions[session_data["id"]] = entry
+
+        return self.get(session_data["id"])
+
+    def get(self, session_id: str) -> Optional[Dict]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        return dict(entry["data"], version=entry["version"])
+
+    def update(self, session_id: str, changes: Dict) -> int:
+        """Apply changed fields and bump the session version if anything differs"""
+        entry = self._sessions[session_id]
+
+        with self._lock:
+            changed = {k: v for k, v in changes.items() if entry["data"].get(k, object()) != v}
+            if changed:
+                entry["version"] += 1
+                entry["data"].update(changed)
+                self._apply(entry, changed)
+
+        return entry["version"]
+
+    def validators(self, session_id: str, fields: Optional[Iterable[str]] = None,
+                   since: Optional[int] = None) -> Tuple[str, datetime]:
+        """Return the ETag value and Last-Modified time for the current version
+
+        Field subsets and deltas are different representations from the full
+        session, so their ETag carries a suffix derived from fields and since.
+        """
+        entry = self._sessions[session_id]
+        etag = f"{session_id}-{entry['version']}"
+        if fields is not None or since is not None:
+            selector = f"{','.join(sorted(set(fields))) if fields is not None else '*'};{since}"
+            etag += "-" + hashlib.sha1(selector.encode("utf-8")).hexdigest()[:8]
+        return etag, entry["last_modified"]
+
+    def render(self, session_id: str, fields: Optional[Iterable[str]] = None,
+               since: Optional[int] = None, encoding: Optional[str] = None) -> Tuple[bytes, Optional[str]]:
+        """Build a response body from cached per-field JSON fragments
+
+        Without fields or since the full session body is cached per encoding
+        until the next version; partial bodies are joined from fragments.
+        Returns the body and the encoding actually applied, which is None
+        for bodies below compression_min_size.
+        """
+        entry = self._sessions[session_id]
+        full = fields is None and since is None
+
+        # Only snapshot under the lock; joining and compressing happen outside it
+        with self._lock:
+            if full and encoding in entry["bodies"]:
+                return entry["bodies"][encoding]
+            version = entry["version"]
+            fragments = dict(entry["fragments"])
+            field_versions = dict(entry["field_versions"])
+
+        keys = list(fragments) if fields is None else list(fields)
+        unknown = [k for k in keys if k not in fragments]
+        if unknown:
+            raise ValueError(f"Unknown session fields: {', '.join(unknown)}")
+
+        if since is not None:
+            keys = [k for k in keys if field_versions[k] > since]
+
+        if not full:
+            keys = ["id"] + [k for k in keys if k != "id"]
+        rendered = self._compress(self._join(fragments, keys), encoding)
+
+        if full:
+            with self._lock:
+                if entry["version"] == version:
+                    entry["bodies"][encoding] = rendered
+
+        return rendered
+
+    def _apply(self, entry: Dict, changed: Dict):
+        """Re-serialize only the fields that changed and drop cached full bodies"""
+        for key, value in changed.items():
+            entry["fragments"][key] = json.dumps(value, separators=(",", ":")).encode("utf-8")
+            entry["field_versions"][key] = entry["version"]
+        entry["fragments"]["version"] = str(entry["version"]).encode("utf-8")
+        entry["field_versions"]["version"] = entry["version"]
+        entry["bodies"] = {}
+
+        # Real update time, never moved backwards; versions within the same second share it,
+        # which is fine because If-None-Match on the version ETag is checked first
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        if entry["last_modified"]:
+            last_modified = max(last_modified, entry["last_modified"])
+        entry["last_modified"] = last_modified
+
+    def _join(self, fragments: Dict, keys) -> bytes:
+        if "version" not in keys:
+            keys = keys + ["version"]
+        parts = [json.dumps(k).encode("utf-8") + b":" + fragments[k] for k in keys]
+        return b"{" + b",".join(parts) + b"}"
+
+    def _compress(self, body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        if len(body) < self.compression_min_size:
+            return body, None
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality), encoding
+        if encoding == "gzip":
+            return gzip.compress(body, compresslevel=self.gzip_level), encoding
+        return body, None